@@ -0,0 +1,253 @@
+"""
+title: holds core
+author: WY
+date: 2025-10-20
+version: 1.0
+license: MIT
+description: 홀딩 인보이스 조회 모듈들이 공유하는 DB 연결, 모델, SQL 정의
+requirements: oracledb
+"""
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict
+import oracledb
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수 설정
+ORACLE_DB_USER = os.getenv("ORACLE_DB_USER", "apps")
+ORACLE_DB_PASSWORD = os.getenv("ORACLE_DB_PASSWORD", "apps")
+ORACLE_DB_DSN = os.getenv("ORACLE_DB_DSN", "161.33.6.86:1521/ebsdb")
+
+# Oracle Instant Client 라이브러리 경로 (미설정 시 기본 설치 경로가 있으면 사용)
+_DEFAULT_ORACLE_CLIENT_LIB_DIR = "/usr/lib/oracle/23/client64/lib"
+ORACLE_CLIENT_LIB_DIR = os.getenv("ORACLE_CLIENT_LIB_DIR") or (
+    _DEFAULT_ORACLE_CLIENT_LIB_DIR if os.path.isdir(_DEFAULT_ORACLE_CLIENT_LIB_DIR) else None
+)
+
+# Oracle Client 초기화 상태 추적
+_oracle_client_initialized = False
+
+# Oracle 커넥션 풀 (프로세스당 최초 사용 시 한 번만 생성)
+_pool = None
+_pool_lock = threading.Lock()
+
+# SQL별 컬럼명 캐시 (쿼리 스키마는 실행 중 변하지 않음)
+_column_names_cache = {}
+
+# 조회 대상 홀드 타입
+HOLD_CODES = ("QTY ORD", "QTY REC", "PRICE", "AMT ORG")
+
+# 홀드 타입 IN 절 바인드 값 (:hold_code_1 ... :hold_code_4)
+HOLD_CODE_BINDS = {f"hold_code_{i}": code for i, code in enumerate(HOLD_CODES, 1)}
+_HOLD_CODE_IN_LIST = ", ".join(f":{name}" for name in HOLD_CODE_BINDS)
+
+# 커넥션 풀 세션별 문장 캐시 크기 (반복 실행 시 soft parse 생략)
+STMT_CACHE_SIZE = 40
+
+# SQL 쿼리 - 상위 20개 레코드만 조회
+# HOLD_ID 인덱스를 역순으로 스캔하여 정렬(SORT) 없이 첫 20건에서 멈추도록 힌트 지정
+HOLD_LIST_SQL = f"""
+SELECT /*+ FIRST_ROWS(20) INDEX_DESC(aha (HOLD_ID)) */
+    aha.INVOICE_ID,
+    aha.LINE_LOCATION_ID,
+    aha.HOLD_ID,
+    aha.HOLD_LOOKUP_CODE,
+    aha.HOLD_REASON
+FROM ap_holds_all aha
+WHERE 1 = 1
+    AND aha.RELEASE_LOOKUP_CODE IS NULL
+    AND aha.HOLD_LOOKUP_CODE IN ({_HOLD_CODE_IN_LIST})
+ORDER BY aha.HOLD_ID DESC
+FETCH FIRST 20 ROWS ONLY
+"""
+
+# 통계 SQL 쿼리 - 해제 여부와 관계없이 전체 홀드 건수
+STATS_SQL = f"""
+SELECT 
+    HOLD_LOOKUP_CODE,
+    COUNT(*) as hold_count
+FROM ap_holds_all
+WHERE HOLD_LOOKUP_CODE IN ({_HOLD_CODE_IN_LIST})
+GROUP BY HOLD_LOOKUP_CODE
+ORDER BY COUNT(*) DESC
+"""
+
+# 통계 SQL 쿼리 - 해제되지 않은(현재 홀딩 중인) 홀드 건수
+UNRELEASED_STATS_SQL = f"""
+SELECT 
+    HOLD_LOOKUP_CODE,
+    COUNT(*) as hold_count
+FROM ap_holds_all
+WHERE RELEASE_LOOKUP_CODE IS NULL
+    AND HOLD_LOOKUP_CODE IN ({_HOLD_CODE_IN_LIST})
+GROUP BY HOLD_LOOKUP_CODE
+ORDER BY COUNT(*) DESC
+"""
+
+# Pydantic 모델 정의 (Pydantic v2 호환)
+class HoldingInvoice(BaseModel):
+    """홀딩된 인보이스 정보"""
+    model_config = ConfigDict(
+        frozen=True,     # DB 조회 결과는 읽기 전용
+        extra='ignore',
+        json_schema_extra={
+            "example": {
+                "invoice_id": 12345,
+                "line_location_id": 67890,
+                "hold_id": 88285,
+                "hold_lookup_code": "QTY ORD",
+                "hold_reason": "Quantity billed exceeds quantity ordered"
+            }
+        }
+    )
+    
+    invoice_id: Optional[int] = Field(None, description="인보이스 ID")
+    line_location_id: Optional[int] = Field(None, description="라인 위치 ID")
+    hold_id: Optional[int] = Field(None, description="홀드 ID")
+    hold_lookup_code: Optional[str] = Field(None, description="홀드 룩업 코드")
+    hold_reason: Optional[str] = Field(None, description="홀드 사유")
+
+class DatabaseConnectionError(Exception):
+    """데이터베이스 연결 오류"""
+    pass
+
+class DatabaseQueryError(Exception):
+    """데이터베이스 쿼리 오류"""
+    pass
+
+def init_oracle_client():
+    """Oracle Client 초기화 (한 번만 실행)"""
+    global _oracle_client_initialized
+    if not _oracle_client_initialized:
+        try:
+            # Oracle Instant Client가 설치되어 있는 경우에만 초기화
+            if ORACLE_CLIENT_LIB_DIR:
+                oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_LIB_DIR)
+            else:
+                oracledb.init_oracle_client()
+            _oracle_client_initialized = True
+            logger.info("Oracle Client Thick mode 초기화 완료")
+        except oracledb.Error as e:
+            # Instant Client 라이브러리가 없는 경우(DPI-1047)에만 Thin mode로 동작 (기본값)
+            error, = e.args
+            if error.full_code != "DPI-1047":
+                raise
+            logger.info("Oracle Client Thin mode 사용: %s", e)
+            _oracle_client_initialized = True
+
+def get_oracle_pool():
+    """Oracle 커넥션 풀을 반환합니다 (최초 호출시 한 번만 생성)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Oracle Client 초기화 (선택사항 - Thin mode가 기본)
+                init_oracle_client()
+
+                logger.info("Oracle DB 커넥션 풀 생성: %s@%s", ORACLE_DB_USER, ORACLE_DB_DSN)
+                _pool = oracledb.create_pool(
+                    user=ORACLE_DB_USER,
+                    password=ORACLE_DB_PASSWORD,
+                    dsn=ORACLE_DB_DSN,
+                    min=2,
+                    max=10,
+                    increment=1,
+                    getmode=oracledb.POOL_GETMODE_WAIT,
+                    stmtcachesize=STMT_CACHE_SIZE
+                )
+    return _pool
+
+def get_oracle_connection():
+    """커넥션 풀에서 Oracle 데이터베이스 연결을 가져옵니다."""
+    try:
+        connection = get_oracle_pool().acquire()
+        logger.debug("Oracle DB 연결 획득")
+        return connection
+        
+    except oracledb.Error as e:
+        error_msg = str(e)
+        logger.error("Oracle DB 연결 실패: %s", error_msg)
+        raise DatabaseConnectionError(f"Oracle DB 연결 실패: {error_msg}")
+    except Exception as e:
+        error_msg = str(e)
+        logger.error("데이터베이스 연결 중 예상치 못한 오류: %s", error_msg)
+        raise DatabaseConnectionError(f"데이터베이스 연결 중 예상치 못한 오류: {error_msg}")
+
+def safe_close_connection(connection):
+    """안전한 연결 반환 (커넥션 풀로 release)"""
+    if connection:
+        try:
+            _pool.release(connection)
+            logger.debug("DB 연결 반환됨")
+        except Exception as e:
+            logger.warning("연결 종료 중 오류: %s", e)
+
+def get_column_names(sql, cursor):
+    """SQL별 소문자 컬럼명을 반환합니다 (SQL당 최초 실행시 한 번만 계산)."""
+    column_names = _column_names_cache.get(sql)
+    if column_names is None:
+        column_names = tuple(desc[0].lower() for desc in cursor.description)
+        _column_names_cache[sql] = column_names
+    return column_names
+
+def format_date(date_value):
+    """날짜 포맷팅"""
+    if date_value is None:
+        return None
+    if isinstance(date_value, datetime):
+        return date_value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(date_value)
+
+def fetch_holding_invoices(cursor) -> List[HoldingInvoice]:
+    """주어진 커서로 홀딩된 인보이스 목록 쿼리를 실행합니다."""
+    # 20건 + 1(결과 끝 확인)을 execute 라운드트립에서 함께 가져옴
+    cursor.arraysize = 50
+    cursor.prefetchrows = 21
+    
+    # 쿼리 실행
+    cursor.execute(HOLD_LIST_SQL, HOLD_CODE_BINDS)
+    
+    # 컬럼명 가져오기
+    column_names = get_column_names(HOLD_LIST_SQL, cursor)
+    
+    # fetch 시점에 바로 HoldingInvoice로 변환 (중간 튜플 리스트를 만들지 않음)
+    cursor.rowfactory = lambda *row: HoldingInvoice.model_construct(**dict(zip(column_names, row)))
+    return cursor.fetchall()
+
+def list_holding_invoices() -> List[HoldingInvoice]:
+    """
+    홀딩된 인보이스 목록을 반환합니다 (상위 20개).
+
+    Oracle 데이터베이스에서 현재 홀딩 상태인 인보이스의 상위 20개를
+    HOLD_ID 역순으로 조회합니다.
+
+    Returns:
+        List[HoldingInvoice]: 홀딩된 인보이스 목록 (최대 20개)
+
+    Raises:
+        DatabaseConnectionError: 데이터베이스 연결 실패시
+        DatabaseQueryError: 쿼리 실행 실패시
+    """
+    connection = None
+    try:
+        connection = get_oracle_connection()
+        holding_invoices = fetch_holding_invoices(connection.cursor())
+        logger.info("조회된 레코드 수: %d", len(holding_invoices))
+        return holding_invoices
+        
+    except DatabaseConnectionError:
+        raise
+    except oracledb.Error as e:
+        error_msg = str(e)
+        logger.error("쿼리 실행 실패: %s", error_msg)
+        raise DatabaseQueryError(f"쿼리 실행 실패: {error_msg}")
+    except Exception as e:
+        error_msg = str(e)
+        logger.error("데이터 조회 중 예상치 못한 오류: %s", error_msg)
+        raise DatabaseQueryError(f"데이터 조회 중 예상치 못한 오류: {error_msg}")
+    finally:
+        safe_close_connection(connection)
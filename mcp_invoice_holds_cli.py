@@ -11,10 +11,23 @@ pip install oci-addons-adk mcp python-dotenv
 """
 
 import asyncio
+import hashlib
+import inspect
+import json
 import os
-from datetime import datetime
+import re
+import threading
+import textwrap
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+import httpx
 from dotenv import load_dotenv
+from mcp import ClientSession
 from mcp.client.session_group import StreamableHttpParameters
+from mcp.client.streamable_http import streamablehttp_client
 from oci.addons.adk import Agent, AgentClient, tool
 from oci.addons.adk.mcp import MCPClientStreamableHttp
 
@@ -27,10 +40,256 @@ MCP_SERVER_URL = f"http://localhost:{MCP_SERVER_PORT}"  # FastMCP 서버 주소
 OCI_REGION = os.getenv("REGION", "ap-osaka-1")  # .env에서 리전 읽기
 OCI_PROFILE = os.getenv("PROFILE", "DEFAULT")  # .env에서 프로필 읽기
 IS_AGENT_SETUP = os.getenv("IS_AGENT_SETUP", "False")  # .env에서 프로필 읽기
+FORCE_SETUP = os.getenv("FORCE_SETUP", "0")  # 1이면 변경 사항이 없어도 agent.setup() 재실행
+AUTOMATED_TEST_CONCURRENCY = 3  # 자동 테스트 케이스 동시 실행 수
+
+# agent.setup() 완료 기록 (Agent Endpoint + 지시사항/도구 스키마 해시)
+SETUP_STATE_FILE = Path("~/.cache/dx-mcp-agent/setup.json").expanduser()
 
 # Agent Endpoint ID (.env 파일에서 읽기)
 AGENT_ENDPOINT_ID = os.getenv("AGENT_ENDPOINT_ID")
 
+# MCP HTTP 연결 설정 (동시 도구 호출이 keep-alive 연결을 재사용하도록 풀 크기/유지 시간 지정)
+MCP_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60)
+MCP_TOOL_TIMEOUT_SECONDS = 60  # 도구 실행 응답 대기 시간 (DB 조회 도구 포함)
+
+def create_mcp_http_client(headers=None, timeout=None, auth=None) -> httpx.AsyncClient:
+    """연결 풀 제한을 지정한 MCP용 httpx 클라이언트를 생성합니다."""
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        headers=headers,
+        timeout=timeout if timeout is not None else httpx.Timeout(30.0),
+        auth=auth,
+        limits=MCP_HTTP_LIMITS
+    )
+
+class TunedMCPClientStreamableHttp(MCPClientStreamableHttp):
+    """httpx 연결 풀 설정과 도구 호출 대기 시간을 적용한 Streamable HTTP MCP 클라이언트"""
+
+    async def connect(self):
+        # 기본 connect()는 ClientSession에 read timeout을 넘기지 않으므로 직접 세션을 생성
+        try:
+            transport, process = await self.exit_stack.enter_async_context(
+                self.create_context_manager(self._process, stderr=self.stderr)
+            )
+            read, write = transport
+            self.session = await self.exit_stack.enter_async_context(
+                ClientSession(read, write, read_timeout_seconds=timedelta(seconds=MCP_TOOL_TIMEOUT_SECONDS))
+            )
+            await self.session.initialize()
+        except Exception:
+            await self.cleanup()
+            raise
+
+    @asynccontextmanager
+    async def create_context_manager(self, process, stderr):
+        transport = streamablehttp_client(
+            url=self.params.url,
+            headers=self.params.headers,
+            timeout=self.params.timeout,
+            sse_read_timeout=self.params.sse_read_timeout,
+            terminate_on_close=self.params.terminate_on_close,
+            httpx_client_factory=create_mcp_http_client
+        )
+        async with transport as (read_stream, write_stream, _):
+            yield (read_stream, write_stream), process
+
+# Agent 지시사항 템플릿 - Oracle 인보이스 홀딩 관리 (모듈 로드 시 한 번만 생성)
+# {tool_guidance} 에는 실제 연결된 서버/로컬 도구에 해당하는 안내만 채워 넣음
+_AGENT_INSTRUCTIONS = textwrap.dedent("""
+    당신은 Oracle ERP 시스템의 인보이스 홀딩 관리 전문가입니다. 
+    사용자의 질문에 따라 적절한 도구를 사용하여 다음과 같은 작업을 수행하세요:
+
+    1. 홀딩된 인보이스 목록 조회 (최대 20개)
+    2. 홀딩 통계 정보 제공 (홀드 타입별 건수)
+    3. 데이터베이스 연결 상태 확인
+    4. 특정 홀드 타입에 대한 설명 제공
+
+    {tool_guidance}
+    홀드 타입 설명:
+    - QTY ORD: 발주 수량 불일치
+    - QTY REC: 수령 수량 불일치  
+    - PRICE: 가격 불일치
+    - AMT ORG: 조직별 금액 불일치
+
+    한국어로 친절하고 상세하게 답변해주세요.
+    데이터를 조회할 때는 먼저 데이터베이스 연결 상태를 확인하고,
+    조회 결과를 표 형태로 정리하여 보기 좋게 제공해주세요.
+""").strip()
+
+# 도구별 사용 안내 (해당 도구가 실제로 제공될 때만 지시사항에 포함)
+_TOOL_GUIDANCE = {
+    "list_holds_by_type": "특정 홀드 타입의 인보이스가 필요하면 전체 목록을 걸러내지 말고 "
+                          "list_holds_by_type 도구에 홀드 타입을 전달하여 조회하세요.",
+    "describe_hold_type": "홀드 타입의 의미는 describe_hold_type 도구로 확인하세요.",
+    "get_hold_snapshot": "전체 홀딩 현황이나 종합 분석을 요청하면 통계와 목록을 한 번에 조회하는 "
+                         "get_hold_snapshot 도구를 우선 사용하세요.",
+    "list_holdings_and_stats": "전체 홀딩 현황이나 종합 분석을 요청하면 통계와 목록을 한 번에 조회하는 "
+                               "list_holdings_and_stats 도구를 우선 사용하세요.",
+}
+
+def build_agent_instructions(tool_names) -> str:
+    """실제로 사용 가능한 도구 이름에 맞춰 Agent 지시사항을 생성합니다."""
+    names = set(tool_names)
+    guidance = [text for name, text in _TOOL_GUIDANCE.items() if name in names]
+    tool_guidance = "\n".join(guidance) + "\n\n" if guidance else ""
+    return _AGENT_INSTRUCTIONS.replace("{tool_guidance}\n", tool_guidance)
+
+# 홀드 타입 설명 (정적 데이터이므로 MCP 서버를 거치지 않고 로컬 도구로 제공)
+HOLD_TYPE_DESCRIPTIONS = {
+    "QTY ORD": "발주 수량 불일치 - 인보이스 청구 수량이 발주(PO) 수량을 초과한 경우",
+    "QTY REC": "수령 수량 불일치 - 인보이스 청구 수량이 입고(수령) 수량을 초과한 경우",
+    "PRICE": "가격 불일치 - 인보이스 단가가 발주(PO) 단가를 허용 범위 이상 초과한 경우",
+    "AMT ORG": "조직별 금액 불일치 - 인보이스 금액이 조직 기준 금액과 일치하지 않는 경우"
+}
+
+@tool
+def describe_hold_type(code: str) -> str:
+    """홀드 타입 코드의 의미를 반환합니다.
+
+    Args:
+        code: 홀드 타입 코드 (QTY ORD, QTY REC, PRICE, AMT ORG)
+    """
+    return HOLD_TYPE_DESCRIPTIONS.get(code.strip().upper(), "unknown")
+
+# MCP를 거치지 않고 에이전트 프로세스 안에서 실행되는 도구 (DB를 사용하지 않는 도구만)
+LOCAL_TOOLS = [describe_hold_type]
+
+# 에이전트 응답 캐시 설정 (비슷한 질문은 LLM 호출 없이 이전 응답 재사용)
+RESPONSE_CACHE_TTL = 300          # 초
+RESPONSE_CACHE_MAX_ENTRIES = 128  # 초과 시 가장 오래 사용하지 않은 항목부터 제거
+RESPONSE_CACHE_SIMILARITY = 0.8   # 문자 bigram Jaccard 유사도 기준 (식별자가 같은 질문끼리만 비교)
+
+# 질문 속 식별자 (숫자, 홀드 코드) - 이 값이 다르면 유사도와 관계없이 다른 질문으로 취급
+_QUERY_IDENTIFIER_PATTERN = re.compile(
+    r"\d+|" + "|".join(r"[\s_]*".join(map(re.escape, code.split())) for code in HOLD_TYPE_DESCRIPTIONS),
+    re.IGNORECASE
+)
+# 연결 상태 등 실시간 상태를 묻는 질문은 캐시하지 않음
+_LIVE_STATE_PATTERN = re.compile(
+    r"연결|접속|상태\s*확인|헬스|실시간|최신|다시|\b(?:connection|connect|ping|health|latest|refresh)\b",
+    re.IGNORECASE
+)
+
+# 에이전트 응답 캐시 {(Agent Endpoint, 정규화된 질문): (bigram 집합, 식별자, 응답, 만료시각)}
+_response_cache = OrderedDict()
+
+def normalize_query(query: str) -> str:
+    """공백/문장부호를 제거하고 소문자로 바꾼 질문을 반환합니다."""
+    return re.sub(r"[\W_]+", "", query.lower())
+
+def query_bigrams(normalized_query: str) -> frozenset:
+    """정규화된 질문의 문자 bigram 집합을 반환합니다 (한국어 어미 변화에 강함)."""
+    if len(normalized_query) < 2:
+        return frozenset([normalized_query])
+    return frozenset(normalized_query[i:i + 2] for i in range(len(normalized_query) - 1))
+
+def query_identifiers(query: str) -> tuple:
+    """질문에 등장하는 숫자와 홀드 코드를 등장 순서대로 반환합니다 (홀드 코드는 정규화)."""
+    return tuple(" ".join(m.upper().replace("_", " ").split()) for m in _QUERY_IDENTIFIER_PATTERN.findall(query))
+
+def is_cacheable_query(query: str) -> bool:
+    """실시간 상태(연결 상태 등)를 묻지 않는 질문만 캐시 대상으로 봅니다."""
+    return _LIVE_STATE_PATTERN.search(query) is None
+
+def lookup_cached_response(query: str):
+    """같거나 충분히 비슷한 질문의 캐시된 응답을 반환합니다 (없으면 None)."""
+    if not is_cacheable_query(query):
+        return None
+    now = time.monotonic()
+    key = (AGENT_ENDPOINT_ID, normalize_query(query))
+    bigrams = query_bigrams(key[1])
+    identifiers = query_identifiers(query)
+
+    # 만료된 항목 제거
+    for cached_key in [k for k, v in _response_cache.items() if v[3] <= now]:
+        del _response_cache[cached_key]
+
+    best_key, best_score = None, RESPONSE_CACHE_SIMILARITY
+    if key in _response_cache:
+        best_key = key
+    else:
+        for cached_key, (cached_bigrams, cached_identifiers, _, _) in _response_cache.items():
+            # 송장 번호/홀드 코드 등 식별자가 정확히 같은 질문만 유사도 비교
+            if cached_key[0] != key[0] or cached_identifiers != identifiers:
+                continue
+            score = len(bigrams & cached_bigrams) / len(bigrams | cached_bigrams)
+            if score >= best_score:
+                best_key, best_score = cached_key, score
+
+    if best_key is None:
+        return None
+    _response_cache.move_to_end(best_key)
+    return _response_cache[best_key][2]
+
+def store_cached_response(query: str, response):
+    """질문에 대한 응답을 캐시에 저장합니다 (실시간 상태 질문은 저장하지 않음)."""
+    if not is_cacheable_query(query):
+        return
+    key = (AGENT_ENDPOINT_ID, normalize_query(query))
+    _response_cache[key] = (
+        query_bigrams(key[1]), query_identifiers(query), response, time.monotonic() + RESPONSE_CACHE_TTL
+    )
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+        _response_cache.popitem(last=False)
+
+async def cached_run(agent, query: str):
+    """응답 캐시를 먼저 확인하고, 없으면 에이전트를 실행하여 결과를 캐시합니다."""
+    response = lookup_cached_response(query)
+    if response is not None:
+        print("⚡ 캐시된 응답을 사용합니다.")
+        return response
+    response = await agent.run_async(query)
+    store_cached_response(query, response)
+    return response
+
+# MCP 클라이언트별 Toolkit 캐시 {id(mcp_client): (mcp_client, Toolkit)}
+_toolkit_cache = {}
+
+async def get_toolkit(mcp_client):
+    """MCP 클라이언트의 Toolkit을 반환합니다 (클라이언트 세션당 tools/list 한 번만 호출)."""
+    cached = _toolkit_cache.get(id(mcp_client))
+    # 클라이언트 참조를 함께 보관하므로 id가 다른 객체에 재사용되지 않음
+    if cached is None or cached[0] is not mcp_client:
+        cached = (mcp_client, await mcp_client.as_toolkit())
+        _toolkit_cache[id(mcp_client)] = cached
+    return cached[1]
+
+def compute_agent_setup_hash(toolkit, instructions: str, local_tools=()) -> str:
+    """setup()이 원격에 동기화하는 지시사항과 도구 이름/설명/파라미터로 해시를 계산합니다."""
+    schema = {
+        "instructions": instructions,
+        "tools": {
+            name: {"description": function_tool.description, "parameters": function_tool.parameters}
+            for name, function_tool in toolkit.functions.items()
+        },
+        "local_tools": {
+            func.__name__: {"description": inspect.getdoc(func), "signature": str(inspect.signature(func))}
+            for func in local_tools
+        }
+    }
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+
+def is_agent_setup_current(schema_hash: str) -> bool:
+    """같은 Agent Endpoint와 도구 스키마로 이미 setup()을 실행했는지 확인합니다."""
+    try:
+        with open(SETUP_STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return state.get("agent_endpoint_id") == AGENT_ENDPOINT_ID and state.get("schema_hash") == schema_hash
+
+def save_agent_setup_state(schema_hash: str):
+    """agent.setup() 완료 기록을 저장합니다."""
+    SETUP_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(SETUP_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "agent_endpoint_id": AGENT_ENDPOINT_ID,
+            "schema_hash": schema_hash,
+            "setup_at": datetime.now().isoformat()
+        }, f, indent=2)
+
 def print_header(title: str):
     """섹션 헤더를 출력합니다."""
     print(f"\n{'='*60}")
@@ -67,7 +326,7 @@ async def main():
             url=f"{MCP_SERVER_URL}/mcp",  # FastMCP 서버 주소
         )
 
-        async with MCPClientStreamableHttp(
+        async with TunedMCPClientStreamableHttp(
             params=params,
             name="Oracle Invoice Holding MCP Server",
         ) as mcp_client:
@@ -82,38 +341,29 @@ async def main():
             )
 
 
-            # Agent 설정 - Oracle 인보이스 홀딩 관리를 위한 지시사항
+            # MCP 도구 목록
+            toolkit = await get_toolkit(mcp_client)
+
+            # Agent 설정
             agent = Agent(
                 client=client,
                 agent_endpoint_id=AGENT_ENDPOINT_ID,
-                instructions="""
-                당신은 Oracle ERP 시스템의 인보이스 홀딩 관리 전문가입니다. 
-                사용자의 질문에 따라 적절한 도구를 사용하여 다음과 같은 작업을 수행하세요:
-                
-                1. 홀딩된 인보이스 목록 조회 (최대 20개)
-                2. 홀딩 통계 정보 제공 (홀드 타입별 건수)
-                3. 데이터베이스 연결 상태 확인
-                4. 특정 홀드 타입에 대한 설명 제공
-                
-                홀드 타입 설명:
-                - QTY ORD: 발주 수량 불일치
-                - QTY REC: 수령 수량 불일치  
-                - PRICE: 가격 불일치
-                - AMT ORG: 조직별 금액 불일치
-                
-                한국어로 친절하고 상세하게 답변해주세요.
-                데이터를 조회할 때는 먼저 데이터베이스 연결 상태를 확인하고,
-                조회 결과를 표 형태로 정리하여 보기 좋게 제공해주세요.
-                """,
-                tools=[await mcp_client.as_toolkit()],
+                instructions=build_agent_instructions(
+                    [*toolkit.functions, *(func.__name__ for func in LOCAL_TOOLS)]
+                ),
+                tools=[*LOCAL_TOOLS, toolkit],
             )
+            schema_hash = compute_agent_setup_hash(toolkit, agent.instructions, LOCAL_TOOLS)
 
-
-            if IS_AGENT_SETUP.lower() == "false":
+            # setup()은 원격 동기화 작업이므로 지시사항이나 도구 스키마가 바뀐 경우에만 실행
+            if IS_AGENT_SETUP.lower() != "false":
+                print("OCI Agent가 이미 설정되었습니다.")
+            elif FORCE_SETUP != "1" and is_agent_setup_current(schema_hash):
+                print("OCI Agent가 이미 설정되었습니다. (지시사항/도구 스키마 변경 없음)")
+            else:
                 agent.setup()
+                save_agent_setup_state(schema_hash)
                 print("✅ OCI Agent가 설정되었습니다.")
-            else:
-                print("OCI Agent가 이미 설정되었습니다.")
             # 자동 테스트 케이스 실행
             await run_automated_tests(agent)
             
@@ -160,25 +410,59 @@ async def run_automated_tests(agent):
         }
     ]
 
-    for test_case in test_cases:
+    # 테스트 케이스는 서로 독립적이므로 동시에 실행 (OCI 호출 제한을 고려해 동시 실행 수 제한)
+    semaphore = asyncio.Semaphore(AUTOMATED_TEST_CONCURRENCY)
+
+    async def run_test_case(query: str):
+        # 한 케이스의 실패가 TaskGroup의 다른 케이스를 취소하지 않도록 예외를 결과로 반환
         try:
-            print_test_case(
-                test_case["num"], 
-                test_case["description"], 
-                test_case["query"]
-            )
-            
-            response = await agent.run_async(test_case["query"])
-            response.pretty_print()
-            
-            print("\n" + "="*60 + "\n")
-            
-            # 테스트 간 잠시 대기
-            await asyncio.sleep(1)
-            
+            async with semaphore:
+                return await cached_run(agent, query)
         except Exception as e:
-            print(f"❌ 테스트 케이스 {test_case['num']} 실행 중 오류: {str(e)}")
+            return e
+
+    async with asyncio.TaskGroup() as task_group:
+        tasks = [
+            task_group.create_task(run_test_case(test_case["query"]), name=f"tc-{test_case['num']}")
+            for test_case in test_cases
+        ]
+
+    for test_case, task in zip(test_cases, tasks):
+        response = task.result()
+        print_test_case(
+            test_case["num"], 
+            test_case["description"], 
+            test_case["query"]
+        )
+        
+        if isinstance(response, Exception):
+            print(f"❌ 테스트 케이스 {test_case['num']} 실행 중 오류: {str(response)}")
             continue
+        
+        response.pretty_print()
+        
+        print("\n" + "="*60 + "\n")
+
+async def async_input(prompt: str) -> str:
+    """이벤트 루프를 막지 않고 콘솔 입력을 받습니다."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def set_future(setter, value):
+        if not future.done():
+            setter(value)
+
+    def read_line():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(set_future, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(set_future, future.set_result, line)
+
+    # daemon 스레드를 사용하여 Ctrl+C 종료 시 입력 대기 스레드 때문에 멈추지 않도록 함
+    threading.Thread(target=read_line, daemon=True).start()
+    return await future
 
 async def run_interactive_mode(agent):
     """대화형 모드를 실행합니다."""
@@ -193,7 +477,7 @@ async def run_interactive_mode(agent):
     
     while True:
         try:
-            user_input = input("❓ 질문: ").strip()
+            user_input = (await async_input("❓ 질문: ")).strip()
             
             if user_input.lower() in ['quit', 'exit', '종료', '나가기', 'q']:
                 print("👋 클라이언트를 종료합니다.")
@@ -206,12 +490,12 @@ async def run_interactive_mode(agent):
             print(f"\n🔍 처리 중: {user_input}")
             print("-" * 50)
             
-            response = await agent.run_async(user_input)
+            response = await cached_run(agent, user_input)
             response.pretty_print()
             
             print("\n" + "-"*50 + "\n")
             
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             print("\n\n👋 클라이언트를 종료합니다.")
             break
         except Exception as e:
@@ -283,6 +567,7 @@ def print_usage():
    MCP_SERVER_PORT=8000
    REGION=ap-osaka-1
    PROFILE=osaka
+   FORCE_SETUP=1   (선택: 변경 사항이 없어도 Agent 설정/도구 재동기화)
 
 🔧 OCI 설정:
    ~/.oci/config 파일이 존재해야 합니다.
@@ -4,12 +4,30 @@
 # sudo dnf install  oracle-instantclient-basic-23.9.0.25.07-1.el9.x86_64.rpm
 
 import os
+import copy
+import time
 import asyncio
+import contextlib
+import functools
 import logging
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field
 import oracledb
+from holds_core import (
+    ORACLE_DB_USER,
+    ORACLE_DB_PASSWORD,
+    ORACLE_DB_DSN,
+    HOLD_CODES,
+    HOLD_CODE_BINDS,
+    STMT_CACHE_SIZE,
+    HOLD_LIST_SQL,
+    UNRELEASED_STATS_SQL,
+    HoldingInvoice,
+    DatabaseConnectionError,
+    DatabaseQueryError,
+)
 from fastmcp import FastMCP
 
 # 로깅 설정
@@ -20,25 +38,27 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # 환경 변수 설정
-ORACLE_DB_USER = os.getenv("ORACLE_DB_USER", "apps")
-ORACLE_DB_PASSWORD = os.getenv("ORACLE_DB_PASSWORD", "apps")
-ORACLE_DB_DSN = os.getenv("ORACLE_DB_DSN", "161.33.6.86:1521/ebsdb")
-
 AGENT_ENDPOINT_ID = os.getenv("AGENT_ENDPOINT_ID", "ocid1.genaiagentendpoint.oc1.ap-osaka-1.amaaaaaarykjadqah2zw7mxczrxoa6o3ebdneenum4s5g5mqfk2urommiytq")
 MCP_SERVER_PORT = os.getenv("MCP_SERVER_PORT", "8000")
 REGION = os.getenv("REGION", "ap-osaka-1")
 PROFILE = os.getenv("PROFILE", "osaka")
 IS_AGENT_SETUP = os.getenv("IS_AGENT_SETUP", "False")
+WARMUP_QUERY = os.getenv("WARMUP_QUERY", "0")  # 1이면 서버 시작 시 데이터 조회 워밍업 실행
+
+# Oracle 커넥션 풀 (최초 사용 시 한 번만 생성)
+_pool = None
+_pool_lock = threading.Lock()
 
-# Oracle Client 초기화 상태 추적
-_oracle_client_initialized = False
+# 조회 결과 TTL 캐시 {캐시 키: (결과, 만료시각)}
+_ttl_cache_store = {}
+_ttl_cache_lock = threading.Lock()
 
 # FastMCP 서버 초기화
 mcp = FastMCP("Invoice Holding Management")
 
-# SQL 쿼리 - 상위 20개 레코드만 조회
-HOLD_LIST_SQL = """
-SELECT
+# 홀드 타입별 목록 SQL 쿼리 - 타입 조건과 건수를 DB에서 처리
+HOLDS_BY_TYPE_SQL = """
+SELECT /*+ FIRST_ROWS(20) INDEX_DESC(aha (HOLD_ID)) */
     aha.INVOICE_ID,
     aha.LINE_LOCATION_ID,
     aha.HOLD_ID,
@@ -47,135 +67,174 @@ SELECT
 FROM ap_holds_all aha
 WHERE 1 = 1
     AND aha.RELEASE_LOOKUP_CODE IS NULL
-    AND aha.HOLD_LOOKUP_CODE IN ('QTY ORD', 'QTY REC', 'PRICE', 'AMT ORG')
+    AND aha.HOLD_LOOKUP_CODE = :hold_type
 ORDER BY aha.HOLD_ID DESC
-FETCH FIRST 20 ROWS ONLY
+FETCH FIRST :row_limit ROWS ONLY
 """
 
-# 통계 SQL 쿼리
-STATS_SQL = """
-SELECT 
-    HOLD_LOOKUP_CODE,
-    COUNT(*) as hold_count
-FROM ap_holds_all
-WHERE RELEASE_LOOKUP_CODE IS NULL
-    AND HOLD_LOOKUP_CODE IN ('QTY ORD', 'QTY REC', 'PRICE', 'AMT ORG')
-GROUP BY HOLD_LOOKUP_CODE
-ORDER BY COUNT(*) DESC
-"""
-
-# Pydantic 모델 정의 (Pydantic v2 호환)
-class HoldingInvoice(BaseModel):
-    """홀딩된 인보이스 정보"""
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "invoice_id": 12345,
-                "line_location_id": 67890,
-                "hold_id": 88285,
-                "hold_lookup_code": "QTY ORD",
-                "hold_reason": "Quantity billed exceeds quantity ordered"
-            }
-        }
-    )
-    
-    invoice_id: Optional[int] = Field(None, description="인보이스 ID")
-    line_location_id: Optional[int] = Field(None, description="라인 위치 ID")
-    hold_id: Optional[int] = Field(None, description="홀드 ID")
-    hold_lookup_code: Optional[str] = Field(None, description="홀드 룩업 코드")
-    hold_reason: Optional[str] = Field(None, description="홀드 사유")
+# 홀드 타입별 목록 최대 조회 건수
+MAX_HOLDS_BY_TYPE_LIMIT = 100
 
 class HoldStatistics(BaseModel):
     """홀딩 통계 정보"""
     total_holds: int = Field(description="전체 홀딩 건수")
     hold_type_counts: Dict[str, int] = Field(description="홀드 타입별 건수")
 
+class HoldSnapshot(BaseModel):
+    """홀딩 현황 스냅샷 (통계 + 인보이스 목록)"""
+    stats: HoldStatistics = Field(description="홀딩 통계 정보")
+    invoices: List[HoldingInvoice] = Field(description="홀딩된 인보이스 목록 (최대 20개)")
+
 class ConnectionTestResult(BaseModel):
     """연결 테스트 결과"""
     status: str = Field(description="연결 상태")
     message: str = Field(description="상태 메시지")
     timestamp: Optional[str] = Field(None, description="테스트 실행 시간")
 
-class DatabaseConnectionError(Exception):
-    """데이터베이스 연결 오류"""
-    pass
-
-class DatabaseQueryError(Exception):
-    """데이터베이스 쿼리 오류"""
-    pass
-
-def init_oracle_client():
-    """Oracle Client 초기화 (한 번만 실행)"""
-    global _oracle_client_initialized
-    if not _oracle_client_initialized:
-        try:
-            # Oracle Instant Client가 설치되어 있는 경우에만 초기화
-            oracledb.init_oracle_client()
-            _oracle_client_initialized = True
-            logger.info("Oracle Client 초기화 완료")
-        except Exception as e:
-            # 이미 초기화되었거나 Thick mode가 불가능한 경우
-            # Thin mode로 동작 (기본값)
-            logger.info(f"Oracle Client Thin mode 사용: {e}")
-            _oracle_client_initialized = True
-
-def get_oracle_connection():
-    """Oracle 데이터베이스 연결을 생성합니다."""
+def get_oracle_pool():
+    """Oracle 비동기 커넥션 풀을 반환합니다 (최초 호출시 한 번만 생성)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # asyncio API는 Thin mode 전용이므로 init_oracle_client()를 호출하지 않음
+                logger.info("Oracle DB 커넥션 풀 생성: %s@%s", ORACLE_DB_USER, ORACLE_DB_DSN)
+                _pool = oracledb.create_pool_async(
+                    user=ORACLE_DB_USER,
+                    password=ORACLE_DB_PASSWORD,
+                    dsn=ORACLE_DB_DSN,
+                    min=2,
+                    max=10,
+                    increment=1,
+                    getmode=oracledb.POOL_GETMODE_WAIT,
+                    stmtcachesize=STMT_CACHE_SIZE,
+                    ping_interval=60  # 60초 이상 유휴 상태였던 연결만 acquire 시 ping
+                )
+    return _pool
+
+@contextlib.asynccontextmanager
+async def get_oracle_connection():
+    """커넥션 풀에서 Oracle 데이터베이스 연결을 가져오고, 사용 후 풀로 반환합니다."""
+    pool = get_oracle_pool()
     try:
-        # Oracle Client 초기화 (선택사항 - Thin mode가 기본)
-        init_oracle_client()
-        
-        logger.info(f"Oracle DB 연결 시도: {ORACLE_DB_USER}@{ORACLE_DB_DSN}")
-        
-        # 연결 생성 (Oracle 19c+ 기본 UTF-8 지원)
-        connection = oracledb.connect(
-            user=ORACLE_DB_USER,
-            password=ORACLE_DB_PASSWORD,
-            dsn=ORACLE_DB_DSN
-        )
-        
-        # 연결 테스트
-        cursor = connection.cursor()
-        cursor.execute("SELECT 1 FROM DUAL")
-        cursor.fetchone()
-        cursor.close()
-        
-        logger.info("Oracle DB 연결 성공")
-        return connection
+        # 연결 상태 점검은 풀이 acquire 시점에 수행 (별도 테스트 쿼리 없음)
+        connection = await pool.acquire()
+        logger.debug("Oracle DB 연결 획득")
         
     except oracledb.Error as e:
         error_msg = str(e)
-        logger.error(f"Oracle DB 연결 실패: {error_msg}")
+        logger.error("Oracle DB 연결 실패: %s", error_msg)
         raise DatabaseConnectionError(f"Oracle DB 연결 실패: {error_msg}")
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"데이터베이스 연결 중 예상치 못한 오류: {error_msg}")
+        logger.error("데이터베이스 연결 중 예상치 못한 오류: %s", error_msg)
         raise DatabaseConnectionError(f"데이터베이스 연결 중 예상치 못한 오류: {error_msg}")
 
-def format_date(date_value):
-    """날짜 포맷팅"""
-    if date_value is None:
-        return None
-    if isinstance(date_value, datetime):
-        return date_value.strftime('%Y-%m-%d %H:%M:%S')
-    return str(date_value)
-
-def safe_close_connection(connection):
-    """안전한 연결 종료"""
-    if connection:
-        try:
-            connection.close()
-            logger.debug("DB 연결 종료됨")
-        except Exception as e:
-            logger.warning(f"연결 종료 중 오류: {e}")
+    try:
+        yield connection
+    finally:
+        await pool.release(connection)
+        logger.debug("DB 연결 반환됨")
+
+def _ttl_cache(key, seconds):
+    """인자 없는 비동기 조회 함수의 결과를 지정한 키로 일정 시간(초) 동안 캐시합니다."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper():
+            now = time.monotonic()
+            with _ttl_cache_lock:
+                cached = _ttl_cache_store.get(key)
+            if cached is None or cached[1] <= now:
+                cached = (await func(), now + seconds)
+                with _ttl_cache_lock:
+                    _ttl_cache_store[key] = cached
+            else:
+                logger.debug("캐시 적중: %s", key)
+            # 호출자가 캐시된 객체를 변경하지 못하도록 복사본 반환
+            return copy.deepcopy(cached[0])
+        return wrapper
+    return decorator
+
+async def _fetch_holding_invoices(cursor, sql: str = HOLD_LIST_SQL, binds: dict = HOLD_CODE_BINDS, limit: int = 20) -> List[HoldingInvoice]:
+    """주어진 커서로 홀딩된 인보이스 목록 쿼리를 실행합니다."""
+    # limit 건 + 1(결과 끝 확인)을 execute 라운드트립에서 함께 가져옴
+    cursor.arraysize = limit
+    cursor.prefetchrows = limit + 1
+    
+    # 쿼리 실행
+    logger.debug("SQL 실행: %s", sql)
+    await cursor.execute(sql, binds)
+    rows = await cursor.fetchall()
+    
+    logger.debug("조회된 레코드 수: %d", len(rows))
+    
+    # 결과 변환 (DB 조회 결과는 신뢰할 수 있으므로 검증 없이 생성, 컬럼 순서는 목록 SQL 기준)
+    holding_invoices = [
+        HoldingInvoice.model_construct(
+            invoice_id=row[0],
+            line_location_id=row[1],
+            hold_id=row[2],
+            hold_lookup_code=row[3],
+            hold_reason=row[4]
+        )
+        for row in rows
+    ]
+    
+    return holding_invoices
+
+async def _fetch_hold_statistics(cursor) -> HoldStatistics:
+    """주어진 커서로 홀딩 통계 쿼리를 실행합니다."""
+    # 통계 쿼리 실행
+    logger.debug("통계 SQL 실행: %s", UNRELEASED_STATS_SQL)
+    await cursor.execute(UNRELEASED_STATS_SQL, HOLD_CODE_BINDS)
+    rows = await cursor.fetchall()
+    
+    logger.debug("통계 조회 결과 수: %d", len(rows))
+    
+    hold_type_counts = {}
+    total_holds = 0
+    
+    for row in rows:
+        hold_type = row[0]
+        count = int(row[1])
+        hold_type_counts[hold_type] = count
+        total_holds += count
+        logger.debug("홀드 타입 %s: %d건", hold_type, count)
+    
+    logger.debug("통계 조회 완료 - 전체: %d건", total_holds)
+    return HoldStatistics(
+        total_holds=total_holds,
+        hold_type_counts=hold_type_counts
+    )
+
+@_ttl_cache("top20", seconds=15)
+async def _list_holding_invoices() -> List[HoldingInvoice]:
+    """홀딩된 인보이스 목록을 조회합니다 (15초간 결과 캐시)."""
+    try:
+        logger.debug("홀딩된 인보이스 목록 조회 시작")
+        
+        async with get_oracle_connection() as connection:
+            return await _fetch_holding_invoices(connection.cursor())
+        
+    except DatabaseConnectionError:
+        raise
+    except oracledb.Error as e:
+        error_msg = str(e)
+        logger.error("쿼리 실행 실패: %s", error_msg)
+        raise DatabaseQueryError(f"쿼리 실행 실패: {error_msg}")
+    except Exception as e:
+        error_msg = str(e)
+        logger.error("데이터 조회 중 예상치 못한 오류: %s", error_msg)
+        raise DatabaseQueryError(f"데이터 조회 중 예상치 못한 오류: {error_msg}")
 
 @mcp.tool()
-def list_holding_invoices() -> List[HoldingInvoice]:
+async def list_holding_invoices() -> List[HoldingInvoice]:
     """
     홀딩된 인보이스 목록을 반환합니다 (상위 20개).
 
     Oracle 데이터베이스에서 현재 홀딩 상태인 인보이스의 상위 20개를 조회합니다.
     홀딩 ID 기준으로 최신순으로 정렬되어 반환됩니다.
+    조회 결과는 15초간 캐시됩니다.
 
     Returns:
         List[HoldingInvoice]: 홀딩된 인보이스 목록 (최대 20개)
@@ -184,66 +243,35 @@ def list_holding_invoices() -> List[HoldingInvoice]:
         DatabaseConnectionError: 데이터베이스 연결 실패시
         DatabaseQueryError: 쿼리 실행 실패시
     """
-    connection = None
+    return await _list_holding_invoices()
+
+@_ttl_cache("stats", seconds=30)
+async def _get_hold_statistics() -> HoldStatistics:
+    """홀딩 통계 정보를 조회합니다 (30초간 결과 캐시)."""
     try:
-        logger.info("홀딩된 인보이스 목록 조회 시작")
+        logger.debug("홀딩 통계 정보 조회 시작")
         
-        # 데이터베이스 연결
-        connection = get_oracle_connection()
-        cursor = connection.cursor()
-        
-        # 쿼리 실행
-        logger.debug(f"SQL 실행: {HOLD_LIST_SQL}")
-        cursor.execute(HOLD_LIST_SQL)
-        rows = cursor.fetchall()
-        
-        logger.info(f"조회된 레코드 수: {len(rows)}")
-        
-        # 컬럼명 가져오기
-        column_names = [desc[0].lower() for desc in cursor.description]
-        logger.debug(f"컬럼명: {column_names}")
-        
-        # 결과 변환
-        holding_invoices = []
-        for i, row in enumerate(rows):
-            try:
-                row_dict = dict(zip(column_names, row))
-                
-                # 날짜 필드 포맷팅
-                if 'last_update_date' in row_dict:
-                    row_dict['last_update_date'] = format_date(row_dict['last_update_date'])
-                if 'hold_date' in row_dict:
-                    row_dict['hold_date'] = format_date(row_dict['hold_date'])
-                
-                holding_invoice = HoldingInvoice(**row_dict)
-                holding_invoices.append(holding_invoice)
-                
-            except Exception as e:
-                logger.warning(f"행 {i} 처리 중 오류: {e}, 데이터: {row}")
-                continue
-        
-        logger.info(f"성공적으로 처리된 레코드 수: {len(holding_invoices)}")
-        return holding_invoices
+        async with get_oracle_connection() as connection:
+            return await _fetch_hold_statistics(connection.cursor())
         
     except DatabaseConnectionError:
         raise
     except oracledb.Error as e:
         error_msg = str(e)
-        logger.error(f"쿼리 실행 실패: {error_msg}")
-        raise DatabaseQueryError(f"쿼리 실행 실패: {error_msg}")
+        logger.error("통계 쿼리 실행 실패: %s", error_msg)
+        raise DatabaseQueryError(f"통계 쿼리 실행 실패: {error_msg}")
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"데이터 조회 중 예상치 못한 오류: {error_msg}")
-        raise DatabaseQueryError(f"데이터 조회 중 예상치 못한 오류: {error_msg}")
-    finally:
-        safe_close_connection(connection)
+        logger.error("통계 조회 중 오류: %s", error_msg)
+        raise DatabaseQueryError(f"통계 조회 중 오류: {error_msg}")
 
 @mcp.tool()
-def get_hold_statistics() -> HoldStatistics:
+async def get_hold_statistics() -> HoldStatistics:
     """
     홀딩 통계 정보를 반환합니다.
 
     각 홀드 타입별 건수와 전체 홀딩 건수를 조회합니다.
+    조회 결과는 30초간 캐시됩니다.
 
     Returns:
         HoldStatistics: 홀딩 통계 정보
@@ -252,89 +280,154 @@ def get_hold_statistics() -> HoldStatistics:
         DatabaseConnectionError: 데이터베이스 연결 실패시
         DatabaseQueryError: 쿼리 실행 실패시
     """
-    connection = None
+    return await _get_hold_statistics()
+
+@mcp.tool()
+async def list_holds_by_type(hold_type: str, limit: int = 20) -> List[HoldingInvoice]:
+    """
+    특정 홀드 타입의 홀딩된 인보이스 목록을 반환합니다.
+
+    홀드 타입 조건과 조회 건수를 DB 쿼리에서 처리하므로, 특정 홀드 타입만 필요할 때
+    list_holding_invoices 결과를 직접 걸러내는 것보다 정확하고 빠릅니다.
+
+    Args:
+        hold_type (str): 홀드 타입 (QTY ORD, QTY REC, PRICE, AMT ORG)
+        limit (int): 최대 조회 건수 (1~100, 기본 20)
+
+    Returns:
+        List[HoldingInvoice]: 해당 홀드 타입의 홀딩된 인보이스 목록 (홀드 ID 최신순)
+
+    Raises:
+        ValueError: 지원하지 않는 홀드 타입이거나 조회 건수가 범위를 벗어난 경우
+        DatabaseConnectionError: 데이터베이스 연결 실패시
+        DatabaseQueryError: 쿼리 실행 실패시
+    """
+    hold_type = hold_type.strip().upper()
+    if hold_type not in HOLD_CODES:
+        raise ValueError(f"지원하지 않는 홀드 타입입니다: {hold_type} (사용 가능: {', '.join(HOLD_CODES)})")
+    if not 1 <= limit <= MAX_HOLDS_BY_TYPE_LIMIT:
+        raise ValueError(f"조회 건수는 1~{MAX_HOLDS_BY_TYPE_LIMIT} 사이여야 합니다: {limit}")
+    
     try:
-        logger.info("홀딩 통계 정보 조회 시작")
-        
-        connection = get_oracle_connection()
-        cursor = connection.cursor()
-        
-        # 통계 쿼리 실행
-        logger.debug(f"통계 SQL 실행: {STATS_SQL}")
-        cursor.execute(STATS_SQL)
-        rows = cursor.fetchall()
+        logger.debug("홀드 타입별 인보이스 목록 조회 시작: %s", hold_type)
         
-        logger.info(f"통계 조회 결과 수: {len(rows)}")
+        async with get_oracle_connection() as connection:
+            return await _fetch_holding_invoices(
+                connection.cursor(),
+                sql=HOLDS_BY_TYPE_SQL,
+                binds={"hold_type": hold_type, "row_limit": limit},
+                limit=limit
+            )
         
-        hold_type_counts = {}
-        total_holds = 0
-        
-        for row in rows:
-            hold_type = row[0]
-            count = int(row[1])
-            hold_type_counts[hold_type] = count
-            total_holds += count
-            logger.debug(f"홀드 타입 {hold_type}: {count}건")
+    except DatabaseConnectionError:
+        raise
+    except oracledb.Error as e:
+        error_msg = str(e)
+        logger.error("쿼리 실행 실패: %s", error_msg)
+        raise DatabaseQueryError(f"쿼리 실행 실패: {error_msg}")
+    except Exception as e:
+        error_msg = str(e)
+        logger.error("데이터 조회 중 예상치 못한 오류: %s", error_msg)
+        raise DatabaseQueryError(f"데이터 조회 중 예상치 못한 오류: {error_msg}")
+
+@_ttl_cache("snapshot", seconds=15)
+async def _get_hold_snapshot() -> HoldSnapshot:
+    """홀딩 통계와 인보이스 목록을 한 연결, 한 커서에서 조회합니다 (15초간 결과 캐시)."""
+    try:
+        logger.debug("홀딩 현황 스냅샷 조회 시작")
         
-        result = HoldStatistics(
-            total_holds=total_holds,
-            hold_type_counts=hold_type_counts
-        )
+        async with get_oracle_connection() as connection:
+            cursor = connection.cursor()
+            stats = await _fetch_hold_statistics(cursor)
+            invoices = await _fetch_holding_invoices(cursor)
         
-        logger.info(f"통계 조회 완료 - 전체: {total_holds}건")
-        return result
+        return HoldSnapshot(stats=stats, invoices=invoices)
         
     except DatabaseConnectionError:
         raise
     except oracledb.Error as e:
         error_msg = str(e)
-        logger.error(f"통계 쿼리 실행 실패: {error_msg}")
-        raise DatabaseQueryError(f"통계 쿼리 실행 실패: {error_msg}")
+        logger.error("쿼리 실행 실패: %s", error_msg)
+        raise DatabaseQueryError(f"쿼리 실행 실패: {error_msg}")
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"통계 조회 중 오류: {error_msg}")
-        raise DatabaseQueryError(f"통계 조회 중 오류: {error_msg}")
-    finally:
-        safe_close_connection(connection)
+        logger.error("데이터 조회 중 예상치 못한 오류: %s", error_msg)
+        raise DatabaseQueryError(f"데이터 조회 중 예상치 못한 오류: {error_msg}")
 
 @mcp.tool()
-def test_database_connection() -> ConnectionTestResult:
+async def get_hold_snapshot() -> HoldSnapshot:
     """
-    데이터베이스 연결 상태를 테스트합니다.
+    홀딩 통계 정보와 홀딩된 인보이스 목록(상위 20개)을 함께 반환합니다.
+
+    전체 현황 파악이나 종합 분석처럼 통계와 목록이 모두 필요할 때 사용합니다.
+    하나의 DB 연결에서 두 쿼리를 연속 실행하므로 get_hold_statistics와
+    list_holding_invoices를 각각 호출하는 것보다 빠릅니다.
+    조회 결과는 15초간 캐시됩니다.
 
     Returns:
-        ConnectionTestResult: 연결 테스트 결과
+        HoldSnapshot: 홀딩 통계 정보와 홀딩된 인보이스 목록
+
+    Raises:
+        DatabaseConnectionError: 데이터베이스 연결 실패시
+        DatabaseQueryError: 쿼리 실행 실패시
+    """
+    return await _get_hold_snapshot()
+
+@mcp.tool()
+def invalidate_cache() -> dict:
+    """
+    조회 결과 캐시를 비웁니다.
+
+    다음 list_holding_invoices / get_hold_statistics / get_hold_snapshot 호출은 DB에서 새로 조회합니다.
+
+    Returns:
+        dict: 비워진 캐시 항목 수
     """
+    with _ttl_cache_lock:
+        cleared = len(_ttl_cache_store)
+        _ttl_cache_store.clear()
+    logger.info("조회 결과 캐시 초기화: %d건", cleared)
+    return {"cleared": cleared}
+
+def _test_timestamp() -> str:
+    """연결 테스트 실행 시간 (UTC, ISO 8601)"""
+    return datetime.now(timezone.utc).isoformat()
+
+async def _test_database_connection() -> ConnectionTestResult:
+    """데이터베이스 연결 상태를 테스트합니다."""
     try:
-        logger.info("데이터베이스 연결 테스트 시작")
-        
-        connection = get_oracle_connection()
-        cursor = connection.cursor()
-        
-        # 간단한 테스트 쿼리
-        cursor.execute("SELECT SYSDATE FROM DUAL")
-        result = cursor.fetchone()
+        logger.debug("데이터베이스 연결 테스트 시작")
         
-        safe_close_connection(connection)
+        async with get_oracle_connection() as connection:
+            # 쿼리 파싱 없이 DB 왕복만 확인
+            await connection.ping()
         
-        timestamp = format_date(result[0]) if result else format_date(datetime.now())
-        
-        logger.info("데이터베이스 연결 테스트 성공")
+        logger.debug("데이터베이스 연결 테스트 성공")
         return ConnectionTestResult(
             status="success",
             message="데이터베이스 연결 성공",
-            timestamp=timestamp
+            timestamp=_test_timestamp()
         )
         
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"데이터베이스 연결 테스트 실패: {error_msg}")
+        logger.error("데이터베이스 연결 테스트 실패: %s", error_msg)
         return ConnectionTestResult(
             status="error",
             message=f"데이터베이스 연결 실패: {error_msg}",
-            timestamp=format_date(datetime.now())
+            timestamp=_test_timestamp()
         )
 
+@mcp.tool()
+async def test_database_connection() -> ConnectionTestResult:
+    """
+    데이터베이스 연결 상태를 테스트합니다.
+
+    Returns:
+        ConnectionTestResult: 연결 테스트 결과
+    """
+    return await _test_database_connection()
+
 async def startup_checks():
     """서버 시작시 초기 점검"""
     try:
@@ -345,40 +438,48 @@ async def startup_checks():
         logger.info(f"  ORACLE_DB_USER: {ORACLE_DB_USER}")
         logger.info(f"  ORACLE_DB_DSN: {ORACLE_DB_DSN}")
         logger.info(f"  MCP_SERVER_PORT: {MCP_SERVER_PORT}")
+        logger.info(f"  WARMUP_QUERY: {WARMUP_QUERY}")
         
-        # 데이터베이스 연결 테스트
-        test_result = test_database_connection()
+        # 데이터베이스 연결 테스트 (준비 상태 확인은 이것으로 충분)
+        test_result = await _test_database_connection()
         if test_result.status == "success":
             logger.info("✅ 초기 데이터베이스 연결 테스트 성공")
         else:
             logger.error(f"❌ 초기 데이터베이스 연결 테스트 실패: {test_result.message}")
             
-        # 간단한 데이터 조회 테스트
-        try:
-            invoices = list_holding_invoices()
-            logger.info(f"✅ 초기 데이터 조회 테스트 성공 - {len(invoices)}건 조회됨")
-        except Exception as e:
-            logger.error(f"❌ 초기 데이터 조회 테스트 실패: {e}")
+        # 데이터 조회 워밍업 (선택, 통계 + 목록을 한 세션에서 조회하여 캐시 적재)
+        if WARMUP_QUERY == "1":
+            try:
+                snapshot = await _get_hold_snapshot()
+                logger.info(f"✅ 초기 데이터 조회 테스트 성공 - {len(snapshot.invoices)}건 조회됨 (전체 홀딩 {snapshot.stats.total_holds}건)")
+            except Exception as e:
+                logger.error(f"❌ 초기 데이터 조회 테스트 실패: {e}")
             
     except Exception as e:
         logger.error(f"⚠️ 서버 시작 전 점검 중 오류: {e}")
 
-if __name__ == "__main__":
-    print("🚀 Invoice Holding Management Server 시작")
-    print("🔗 Oracle DB 연결 정보:")
-    print(f"   - 사용자: {ORACLE_DB_USER}")
-    print(f"   - DSN: {ORACLE_DB_DSN}")
-    print(f"🌐 MCP Server: http://localhost:{MCP_SERVER_PORT}")
-    print("\n🎯 MCP 서버 시작 중...")
-    
-    # 비동기 초기화 실행
-    asyncio.run(startup_checks())
+async def main():
+    """초기 점검과 MCP 서버를 같은 이벤트 루프에서 실행 (비동기 커넥션 풀은 루프에 묶임)"""
+    await startup_checks()
     
     print("\n🎉 MCP 서버 시작 준비 완료!")
     print("📊 사용 가능한 도구:")
     print("   - list_holding_invoices: 홀딩된 인보이스 목록 조회")
     print("   - get_hold_statistics: 홀딩 통계 정보 조회")
+    print("   - get_hold_snapshot: 홀딩 통계 + 인보이스 목록 한 번에 조회")
+    print("   - list_holds_by_type: 홀드 타입별 인보이스 목록 조회")
+    print("   - invalidate_cache: 조회 결과 캐시 초기화")
     print("   - test_database_connection: DB 연결 상태 테스트")
     
     # MCP 서버 시작
-    mcp.run(transport="streamable-http", port=int(MCP_SERVER_PORT), host="0.0.0.0")
\ No newline at end of file
+    await mcp.run_async(transport="streamable-http", port=int(MCP_SERVER_PORT), host="0.0.0.0")
+
+if __name__ == "__main__":
+    print("🚀 Invoice Holding Management Server 시작")
+    print("🔗 Oracle DB 연결 정보:")
+    print(f"   - 사용자: {ORACLE_DB_USER}")
+    print(f"   - DSN: {ORACLE_DB_DSN}")
+    print(f"🌐 MCP Server: http://localhost:{MCP_SERVER_PORT}")
+    print("\n🎯 MCP 서버 시작 중...")
+    
+    asyncio.run(main())
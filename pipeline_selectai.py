@@ -6,12 +6,60 @@
 # requirements: ["oracledb", "python-dotenv"]
 # ---
 
+import asyncio
 import os
 import re
 import oracledb
 from dotenv import load_dotenv
 from datetime import datetime
 
+# clean_sql 에서 매 호출마다 사용하는 정규식 (모듈 로드 시 1회 컴파일)
+# SHOWSQL 은 스키마명을 대문자로 출력하므로 대소문자 구분 매칭
+_RE_SCHEMA = re.compile(r'"?HOL_AGENT_05"?\.')
+_RE_ORDER_COLUMN = re.compile(r"ORDER\s+BY\s+[A-Za-z0-9_\".]")
+# DML/DDL, FROM/JOIN 대상, FETCH/ORDER/WHERE 위치를 한 번의 스캔으로 찾기 위한 통합 패턴
+# (FROM/JOIN 대상 객체명은 lookahead 로만 캡처하여 다른 토큰 검사를 가리지 않도록 함)
+_RE_SQL_TOKENS = re.compile(
+    r"(?P<dml>\b(?:insert|update|delete|merge|create|alter|drop|grant|revoke|truncate)\b)"
+    r"|(?P<fromjoin>\b(?:from|join)\s+(?=(?P<obj>[A-Za-z0-9_\"\.]+)))"
+    r"|(?P<fetch>\bFETCH\s+FIRST\b)"
+    r"|(?P<order>\bORDER\s+BY\b)"
+    r"|(?P<where>\bwhere\b)",
+    re.IGNORECASE,
+)
+
+_FENCE = "```"
+
+
+def _strip_code_fence(s: str) -> str:
+    """앞쪽 ```... 줄과 끝의 ``` 줄을 제거 (정규식 대신 find/slice 사용)"""
+    start = 0
+    if s.startswith(_FENCE):
+        nl = s.find("\n")
+        if nl != -1:
+            start = nl + 1
+    end = len(s)
+    if s.endswith("\n" + _FENCE) and end - 4 >= start:
+        end -= 4
+    return s[start:end]
+
+
+# Select AI SHOWSQL (프롬프트/프로필은 바인드 변수로 전달)
+SELECTAI_SHOWSQL = (
+    "SELECT DBMS_CLOUD_AI.GENERATE(prompt => :1, profile_name => :2, action => 'showsql') FROM DUAL"
+)
+
+# init_oracle_client 는 프로세스당 한 번만 호출 가능
+_ORACLE_INITED = False
+
+
+def _require_dir(env_var: str) -> str:
+    """환경 변수가 가리키는 디렉터리 경로를 반환 (없거나 디렉터리가 아니면 RuntimeError)"""
+    path = os.getenv(env_var)
+    if not path or not os.path.isdir(path):
+        raise RuntimeError(f"{env_var} invalid: {path}")
+    return path
+
 
 class Pipeline:
     def __init__(self):
@@ -29,12 +77,31 @@ class Pipeline:
         self.V_DSN = os.getenv("VISION_DSN", "161.33.6.86:1521/ebsdb")
         self.V_SCHEMA = None  # Vision DB의 실제 스키마명 (자동 감지)
 
+        # --- Connection Pools (on_startup 에서 생성) ---
+        self._adw_pool = None
+        self._vision_pool = None
+
+        # --- SQL Log Writer (on_startup 에서 생성) ---
+        self.SQL_LOG_FILE = "vision_sql.log"
+        self._log_queue = None
+        self._log_task = None
+
         # --- Meta ---
         self.META_TBL = "AP_HOLDS_ALL"
+        self._meta_tbl_upper = self.META_TBL.upper()
         self.REAL_TBL = os.getenv("REAL_TBL", "AP_HOLDS_ALL")
         self.HOLD_CODES = ("QTY ORD", "QTY REC", "PRICE", "AMT ORG")
         self.FORCE_RELEASE_NULL = True
 
+        # clean_sql 에서 주입할 고정 WHERE 조건 (호출마다 재생성하지 않도록 미리 계산)
+        fixed = []
+        if self.FORCE_RELEASE_NULL:
+            fixed.append("RELEASE_LOOKUP_CODE IS NULL")
+        if self.HOLD_CODES:
+            codes = ", ".join(repr(x) for x in self.HOLD_CODES)
+            fixed.append(f"HOLD_LOOKUP_CODE IN ({codes})")
+        self._where_inject = " AND ".join(fixed)
+
         # --- Prompt ---
         self.PROMPT = (
             f"너는 Vision AP Holds SQL 비서야.\n"
@@ -60,17 +127,30 @@ class Pipeline:
         self.V_DSN = os.getenv("VISION_DSN", self.V_DSN)
         self.REAL_TBL = os.getenv("REAL_TBL", self.REAL_TBL)
 
-        # Thick Mode Init
-        ic_dir = os.getenv("ORACLE_CLIENT_LIB_DIR")
-        wallet = os.getenv("ADW_WALLET_DIR")
-        if not ic_dir or not os.path.isdir(ic_dir):
-            raise RuntimeError(f"ORACLE_CLIENT_LIB_DIR invalid: {ic_dir}")
-        if not wallet or not os.path.isdir(wallet):
-            raise RuntimeError(f"ADW_WALLET_DIR invalid: {wallet}")
+        # Thick Mode Init (프로세스당 1회만 가능하므로 재생성/리로드 시에는 건너뜀)
+        global _ORACLE_INITED
+        if not _ORACLE_INITED:
+            ic_dir = _require_dir("ORACLE_CLIENT_LIB_DIR")
+            wallet = _require_dir("ADW_WALLET_DIR")
+            oracledb.init_oracle_client(lib_dir=ic_dir, config_dir=wallet)
+            os.environ.setdefault("TNS_ADMIN", wallet)
+            _ORACLE_INITED = True
+            print(f"[SelectAI] Thick mode initialized (lib={ic_dir}, wallet={wallet})")
+
+        # 요청마다 새 연결을 맺지 않도록 세션 풀 생성 (리로드 시 기존 풀은 먼저 정리)
+        # min=0: 시작 시점에 세션을 미리 열지 않으므로 DB 접속 실패가 on_startup 을 중단시키지 않음
+        self._close_pools()
+        self._adw_pool = oracledb.create_pool(
+            user=self.AD_USER, password=self.AD_PW, dsn=self.AD_TNS, min=0, max=4, increment=1
+        )
+        self._vision_pool = oracledb.create_pool(
+            user=self.V_USER, password=self.V_PW, dsn=self.V_DSN, min=0, max=4, increment=1
+        )
+        print("[SelectAI] Connection pools created (ADW, Vision)")
 
-        oracledb.init_oracle_client(lib_dir=ic_dir, config_dir=wallet)
-        os.environ.setdefault("TNS_ADMIN", wallet)
-        print(f"[SelectAI] Thick mode initialized (lib={ic_dir}, wallet={wallet})")
+        # vision_sql.log 는 백그라운드 태스크에서 모아서 기록
+        self._log_queue = asyncio.Queue()
+        self._log_task = asyncio.create_task(self._log_writer())
 
         # Vision DB Schema 감지
         try:
@@ -83,30 +163,83 @@ class Pipeline:
             self.V_SCHEMA = self.V_USER.upper()
 
     async def on_shutdown(self):
+        if self._log_task is not None:
+            # 남은 로그를 모두 기록한 뒤 종료
+            if self._log_task.done():
+                pending = []
+                while not self._log_queue.empty():
+                    pending.append(self._log_queue.get_nowait())
+                if pending:
+                    self._append_log("".join(pending))
+            else:
+                self._log_queue.put_nowait(None)
+                await self._log_task
+            self._log_queue = self._log_task = None
+        self._close_pools()
         print("[SelectAI] on_shutdown complete")
 
     # ---------------- Connections ----------------
+    def _close_pools(self):
+        for pool in (self._adw_pool, self._vision_pool):
+            if pool is not None:
+                try:
+                    pool.close()
+                except oracledb.Error as e:
+                    print(f"[SelectAI] ⚠️ 커넥션 풀 종료 실패: {e}")
+        self._adw_pool = self._vision_pool = None
+
     def conn_adw(self):
-        return oracledb.connect(user=self.AD_USER, password=self.AD_PW, dsn=self.AD_TNS)
+        if self._adw_pool is None:
+            raise RuntimeError("pools not initialised; call on_startup()")
+        return self._adw_pool.acquire()
 
     def conn_vision(self):
-        return oracledb.connect(user=self.V_USER, password=self.V_PW, dsn=self.V_DSN)
+        if self._vision_pool is None:
+            raise RuntimeError("pools not initialised; call on_startup()")
+        return self._vision_pool.acquire()
 
     # ---------------- Helpers ----------------
-    @staticmethod
-    def _escape_literal(s: str) -> str:
-        return (s or "").replace("'", "''")
+    def _append_log(self, text: str) -> None:
+        with open(self.SQL_LOG_FILE, "a") as f:
+            f.write(text)
+
+    async def _log_writer(self, batch_size: int = 10, flush_interval: float = 1.0):
+        """로그 큐를 소비하여 최대 batch_size 건 또는 flush_interval 초 단위로 한 번에 기록"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._log_queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = loop.time() + flush_interval
+            while len(batch) < batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._log_queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            try:
+                await asyncio.to_thread(self._append_log, "".join(batch))
+            except OSError as e:
+                print(f"[Vision] ⚠️ SQL 로그 기록 실패: {e}")
 
     # ---------------- Core Steps ----------------
     def adw_selectai(self, user_msg: str) -> str:
         """ADW에서 Select AI SHOWSQL을 사용하여 SQL 생성"""
         with self.conn_adw() as c, c.cursor() as cur:
-            cur.execute("BEGIN DBMS_CLOUD_AI.SET_PROFILE(:1); END;", [self.PROFILE])
             text = self.PROMPT + "\n\n[질문]\n" + (user_msg or "")
-            lit = self._escape_literal(text)
-            cur.execute(f"SELECT AI SHOWSQL '{lit}' FROM DUAL")
+            # 프롬프트/프로필을 바인드하여 매 호출 동일한 SQL 텍스트 유지 (문장 캐시 재사용)
+            cur.execute(SELECTAI_SHOWSQL, [text, self.PROFILE])
             row = cur.fetchone()
-            raw_sql = (row[0] if row else "").strip()
+            # GENERATE 는 CLOB 을 반환
+            raw_sql = (row[0].read() if row and row[0] is not None else "").strip()
             print("[SelectAI] RAW SQL:", raw_sql)
             return raw_sql
 
@@ -117,49 +250,70 @@ class Pipeline:
         s = sql.strip()
 
         # 코드펜스 제거 및 세미콜론 제거
-        s = re.sub(r"^```.*?\n|\n```$", "", s, flags=re.DOTALL).rstrip(";")
+        s = _strip_code_fence(s).rstrip(";")
 
         # 🔧 스키마 자동 교정 (HOL_AGENT_05 → Vision 스키마)
-        if self.V_SCHEMA:
-            s = re.sub(r'"?HOL_AGENT_05"?\.', f'{self.V_SCHEMA}.', s, flags=re.IGNORECASE)
+        if self.V_SCHEMA and "HOL_AGENT_05" in s:
+            s = _RE_SCHEMA.sub(f'{self.V_SCHEMA}.', s)
             print(f"[SelectAI] Schema auto-adjusted → {self.V_SCHEMA}.")
 
-        # 🚫 DML/DDL 차단
-        if re.search(r"\b(insert|update|delete|merge|create|alter|drop|grant|revoke|truncate)\b", s, re.I):
-            raise ValueError("DML/DDL 문장은 허용되지 않습니다.")
-
-        # ✅ FROM/JOIN 테이블 검증 (스키마명은 허용, 테이블명만 검사)
-        for _, obj in re.findall(r"\b(from|join)\s+([A-Za-z0-9_\"\.]+)", s, re.I):
-            parts = [p.strip('"') for p in obj.split(".")]
-            table_name = parts[-1].upper()
-            if table_name != self.META_TBL.upper():
-                raise ValueError(f"허용되지 않은 테이블이 포함되어 있습니다: {obj}")
-
-        # ✅ ORDER/FETCH 구문 분리
+        # 🔍 DML/DDL, FROM/JOIN 대상, FETCH/ORDER/WHERE 위치를 한 번에 수집
+        bad_table = None
+        fetch_match = order_match = where_match = None
+        for m in _RE_SQL_TOKENS.finditer(s):
+            kind = m.lastgroup
+            if kind == "dml":
+                # 🚫 DML/DDL 차단
+                raise ValueError("DML/DDL 문장은 허용되지 않습니다.")
+            if kind == "fromjoin":
+                # ✅ FROM/JOIN 테이블 검증 (스키마명은 허용, 테이블명만 검사)
+                if bad_table is None:
+                    obj = m.group("obj")
+                    if obj.rpartition(".")[2].strip('"').upper() != self._meta_tbl_upper:
+                        bad_table = obj
+            elif kind == "fetch":
+                if fetch_match is None:
+                    fetch_match = m
+            elif fetch_match is None:
+                # FETCH 이후의 ORDER/WHERE 는 잘려 나가므로 무시
+                if kind == "order":
+                    if order_match is None:
+                        order_match = m
+                elif kind == "where" and order_match is None and where_match is None:
+                    where_match = m
+
+        # DML/DDL 차단이 우선이므로 테이블 오류는 스캔이 끝난 뒤 보고
+        if bad_table is not None:
+            raise ValueError(f"허용되지 않은 테이블이 포함되어 있습니다: {bad_table}")
+
+        # ✅ ORDER/FETCH 구문 분리 (수집한 위치 기준으로 슬라이스)
         fetch_part, order_part = "", ""
-        fetch_match = re.search(r"(?i)\bFETCH\s+FIRST\b.*", s)
+        cut = len(s)
         if fetch_match:
-            fetch_part = fetch_match.group(0).strip()
-            s = s[:fetch_match.start()].strip()
-        order_match = re.search(r"(?i)\bORDER\s+BY\b[^\n;]*", s)
+            # FETCH FIRST 이후 해당 줄 끝까지 (FETCH\s+FIRST 자체는 줄바꿈을 포함할 수 있음)
+            line_end = s.find("\n", fetch_match.end())
+            fetch_part = s[fetch_match.start():line_end if line_end != -1 else cut].strip()
+            cut = fetch_match.start()
         if order_match:
-            order_part = order_match.group(0).strip()
-            s = s[:order_match.start()].strip()
+            # ORDER BY 이후 줄 끝 또는 세미콜론 전까지
+            order_end = cut
+            for stop in ("\n", ";"):
+                idx = s.find(stop, order_match.end(), order_end)
+                if idx != -1:
+                    order_end = idx
+            order_part = s[order_match.start():order_end].strip()
+            cut = order_match.start()
 
         # ✅ ORDER 컬럼 보정
-        if order_part and not re.search(r"ORDER\s+BY\s+[A-Za-z0-9_\".]", order_part):
+        if order_part and not _RE_ORDER_COLUMN.search(order_part):
             order_part = 'ORDER BY "HOLD_DATE" ASC'
 
         # ✅ WHERE 조건 주입
-        fixed = []
-        if self.FORCE_RELEASE_NULL:
-            fixed.append(f"RELEASE_LOOKUP_CODE IS NULL")
-        if self.HOLD_CODES:
-            codes = ", ".join(repr(x) for x in self.HOLD_CODES)
-            fixed.append(f"HOLD_LOOKUP_CODE IN ({codes})")
-        inject = " AND ".join(fixed)
-        if re.search(r"\bwhere\b", s, re.I):
-            s = re.sub(r"(?i)\bwhere\b", f"WHERE {inject} AND", s, count=1)
+        inject = self._where_inject
+        if cut != len(s):
+            s = s[:cut].rstrip()
+        if where_match:
+            s = f"{s[:where_match.start()]}WHERE {inject} AND{s[where_match.end():]}"
         else:
             s += f" WHERE {inject}"
 
@@ -178,14 +332,22 @@ class Pipeline:
             print("\n[Vision] 실행 SQL:\n", q)
 
             with self.conn_vision() as c, c.cursor() as cur:
+                # 기본 FETCH FIRST 100 결과를 한 번의 왕복으로 가져오도록 배치 크기 조정
+                cur.arraysize = 200
+                cur.prefetchrows = 201
                 cur.execute(q)
-                cols = [d[0] for d in cur.description] if cur.description else []
-                rows = cur.fetchall() or []
-                result = [dict(zip(cols, r)) for r in rows]
+                if cur.description:
+                    cols = [d[0] for d in cur.description]
+                    cur.rowfactory = lambda *args: dict(zip(cols, args))
+                result = cur.fetchall() or []
                 print(f"[Vision] 결과: {len(result)}건 조회됨")
 
-                with open("vision_sql.log", "a") as f:
-                    f.write(f"\n[{datetime.now()}] {q}\n결과: {len(result)}건\n")
+                entry = f"\n[{datetime.now()}] {q}\n결과: {len(result)}건\n"
+                if self._log_task is None or self._log_task.done():
+                    # 로그 기록 태스크가 없거나 이미 종료된 경우 직접 기록
+                    self._append_log(entry)
+                else:
+                    self._log_queue.put_nowait(entry)
 
                 return result
 
@@ -209,7 +371,7 @@ class Pipeline:
             elif isinstance(data, list) and "error" in data[0]:
                 message = f"쿼리 실행 중 오류가 발생했습니다: {data[0]['error']}"
             elif len(data) == 1 and len(data[0]) == 1:
-                key, value = list(data[0].items())[0]
+                key, value = next(iter(data[0].items()))
                 message = f"{key}는 {value}개입니다."
             else:
                 message = f"총 {len(data)}건이 조회되었습니다."
@@ -221,16 +383,22 @@ class Pipeline:
 
 
 if __name__ == "__main__":
-    import asyncio
     import sys
 
     load_dotenv(override=True)
     user_question = "홀딩된 인보이스 목록을 보여줘" if len(sys.argv) == 1 else " ".join(sys.argv[1:])
 
-    try:
+    async def _main():
+        # 로그 기록 태스크가 살아 있도록 startup/run/shutdown 을 하나의 이벤트 루프에서 실행
         pipeline = Pipeline()
-        asyncio.run(pipeline.on_startup())
-        result = asyncio.run(pipeline.run(user_question))
+        await pipeline.on_startup()
+        try:
+            return await pipeline.run(user_question)
+        finally:
+            await pipeline.on_shutdown()
+
+    try:
+        result = asyncio.run(_main())
         print("\n=== PIPELINE RESULT ===")
         print(result)
     except Exception as e:
@@ -38,31 +38,28 @@ INLINE_DATABASE_SCHEMA = """
    )  ;
 """
 
-INLINE_DATABASE_SCHEMA = """
- CREATE TABLE APPS.MCP_AP_HOLDS_ALL
-   (	
-       "ROWNUM" RNO,
-       "INVOICE_ID" NUMBER(15,0), 
-	"LINE_LOCATION_ID" NUMBER(15,0), 
-        "HOLD_ID" NUMBER(15,0), 
-	"HOLD_LOOKUP_CODE" VARCHAR2(25 BYTE), 
-	"HOLD_REASON" VARCHAR2(240 BYTE)
-   )  ;
-"""
-
 # AGENT_ENDPOINT_ID=ocid1.genaiagentendpoint.oc1.ap-osaka-1.amaaaaaarykjadqah2zw7mxczrxoa6o3ebdneenum4s5g5mqfk2urommiytq
 # MCP_SERVER_PORT=8000
 # REGION=ap-osaka-1
 # PROFILE=osaka
 
-async def main():
+# 최초 호출 시 한 번만 생성하여 재사용 (OCI SDK 클라이언트/서명 설정 비용 절감)
+_CLIENT = None
+_TOOL = None
+_AGENT = None
+
+def get_agent() -> Agent:
+    global _CLIENT, _TOOL, _AGENT
+    if _AGENT is not None:
+        return _AGENT
+
     agent_endpoint_id=os.getenv("AGENT_ENDPOINT_ID")
     region=os.getenv("REGION")
     profile=os.getenv("PROFILE")
     
-    client = AgentClient(auth_type="api_key", profile=profile, region=region)
+    _CLIENT = AgentClient(auth_type="api_key", profile=profile, region=region)
 
-    sql_tool_with_inline_schema = AgenticSqlTool(
+    _TOOL = AgenticSqlTool(
         name="get_invoice_holdings",
         description="Use this tool-InvoiceStatusChecker to answer questions about invoice holds.",
         database_schema=InlineInputLocation(content=INLINE_DATABASE_SCHEMA),
@@ -75,24 +72,28 @@ async def main():
         custom_instructions="Use this tool-InvoiceStatusChecker to answer questions about invoice holds. 건수가 명시 되지 않으면 10건만 보여준다."
     )
 
-    agent = Agent(
-        client=client,
+    _AGENT = Agent(
+        client=_CLIENT,
         agent_endpoint_id=agent_endpoint_id,
         instructions="Use the tools : InvoiceStatusChecker to answer the questions.",
 
-        tools=[sql_tool_with_inline_schema]
+        tools=[_TOOL]
     )
+    return _AGENT
+
+async def run(input_msg: str):
+    return await get_agent().run_async(input_msg)
 
+async def main():
     # 2개의 질문을 차례로 질의하고 답변받음
     # input_msg ="홀딩된 인보이스 목록을 보여줘, hold 이유도 포함하여  20건 만 보여주고 hold_date으로 descending 해줘" 
     input_msg ="list first 10 records in ap_holds_all where release_reason is null " 
     input_msg ="list first 10 records in ap_holds_all where release_reason is null and hold_loook_code in ('QTY ORD', 'QTY  REC', 'PRICE', 'AMT ORG');"
     input_msg =" 인보이스 보류 현황을 조회"
     print(f"Running: {input_msg}")
-    response = await agent.run_async(input_msg)
+    response = await run(input_msg)
     
     response.pretty_print()
 
-
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file